@@ -3,12 +3,17 @@ import os
 import json
 from contextlib import asynccontextmanager
 from datetime import date as date_type
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+import orjson
 from dotenv import load_dotenv
 from fastapi import FastAPI, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from openai import OpenAI
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel, Field
-from src.emotion_service import emotion_to_color
+from src.emotion_service import emotion_to_color, label_emotion_locally
+from src.llm_gateway import LLMGateway, LLMUnavailableError, parse_json_object
 from src.prompts import (
     get_prompt_for_daily_summary,
     get_prompt_for_diary_writing,
@@ -16,19 +21,36 @@ from src.prompts import (
     get_rag_context_prompt
     )
 from src.rag_service import MemoryRAGStore
+from src.summary_pipeline import DailySummaryPipeline
+from src.write_behind import WriteBehindQueue
 from src import database
 from src.repositories import diaries as diary_repo
-from src.repositories import schedules as schedule_repo
+
+try:
+    from brotli_asgi import BrotliMiddleware
+except Exception:  # pragma: no cover - optional dependency at runtime
+    BrotliMiddleware = None  # type: ignore
 
 load_dotenv()
 
+class ORJSONResponse(JSONResponse):
+    """표준 json 대신 orjson으로 직렬화하는 기본 응답 클래스."""
+
+    def render(self, content) -> bytes:
+        return orjson.dumps(content)
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     await database.create_pool()
+    summary_pipeline.start()
+    write_behind.start()
     yield
+    # 남은 일정/메모리를 모두 기록한 뒤 종료
+    await write_behind.stop()
+    await summary_pipeline.stop()
     await database.close_pool()
 
-app = FastAPI(lifespan=lifespan)
+app = FastAPI(lifespan=lifespan, default_response_class=ORJSONResponse)
 
 # CORS 설정
 app.add_middleware(
@@ -62,9 +84,37 @@ async def log_responses(request: Request, call_next):
         media_type=response.media_type
     )
 
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY")) #huggingface 환경변수
+# 긴 메시지 기록 압축 (로그 미들웨어보다 바깥에 두어 로그는 원문으로 출력)
+if BrotliMiddleware is not None:
+    app.add_middleware(BrotliMiddleware, minimum_size=1000, gzip_fallback=True)
+else:
+    app.add_middleware(GZipMiddleware, minimum_size=1000)
+
+llm = LLMGateway.from_env() #huggingface 환경변수
+# 백그라운드 요약 전용 게이트웨이: 동시성/속도 한도와 서킷 브레이커를 대화 트래픽과 분리
+background_llm = LLMGateway.from_env(max_concurrency=1, rate_per_sec=0.5, burst=1, hedge=False)
 rag_store = MemoryRAGStore()
 
+async def summarize_messages(messages: list[dict], gateway: LLMGateway = llm) -> str:
+    return await gateway.chat_completion(
+        model="gpt-4o-mini",
+        messages=[
+            get_prompt_for_daily_summary(),
+            *[{"role": m["role"], "content": m["content"]} for m in messages],
+        ],
+        max_tokens=180,
+    )
+
+summary_pipeline = DailySummaryPipeline(
+    rag_store,
+    lambda messages: summarize_messages(messages, background_llm),
+)
+write_behind = WriteBehindQueue(
+    rag_store,
+    flush_interval=float(os.getenv("WRITE_BEHIND_FLUSH_INTERVAL", "1.0")),
+    max_pending=int(os.getenv("WRITE_BEHIND_MAX_PENDING", "1000")),
+)
+
 class ChatMessage(BaseModel):
     role: str
     content: str
@@ -73,6 +123,8 @@ class ChatMessage(BaseModel):
 class ChatRequest(BaseModel):
     user_id: int
     messages: list[ChatMessage] = Field(default_factory=list)
+    # 클라이언트 기준 날짜 (일기 날짜와 동일). 없으면 서버 날짜 사용
+    date: date_type | None = None
 
 class AddSchedule(BaseModel):
     title: str
@@ -131,24 +183,36 @@ async def chat(request: ChatRequest):
             request.messages[-1].content,
         )
 
-        retrieved = rag_store.retrieve(last_user_message, k=3)
-        retrieved_contexts = [item["text"] for item in retrieved]
-
-        completion = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[get_prompt_for_diary_writing(),
-                      get_rag_context_prompt(retrieved_contexts),
-                      *[msg.model_dump() for msg in request.messages]],
-            max_tokens=500,
-            response_format={"type": "json_object"},
+        retrieved = rag_store.retrieve(
+            last_user_message,
+            k=3,
+            emotion=rag_store.latest_emotion(request.user_id),
+            user_id=request.user_id,
         )
+        retrieved_contexts = [item["text"] for item in retrieved]
 
-        response_text = (completion.choices[0].message.content or "").strip()
-        # LLM이 마크다운 코드블록으로 감쌀 경우 제거
-        if response_text.startswith("```"):
-            response_text = response_text.split("\n", 1)[-1].rsplit("```", 1)[0].strip()
-
-        parsed = json.loads(response_text)
+        try:
+            response_text = await llm.chat_completion(
+                model="gpt-4o-mini",
+                messages=[get_prompt_for_diary_writing(),
+                          get_rag_context_prompt(retrieved_contexts),
+                          *[msg.model_dump() for msg in request.messages]],
+                max_tokens=500,
+                response_format={"type": "json_object"},
+            )
+        except LLMUnavailableError:
+            # LLM 장애 시 로컬 감정 라벨링으로 응답
+            emotion = label_emotion_locally(last_user_message)
+            return ORJSONResponse(ChatResponse(
+                type="diary",
+                chat="지금은 답변을 만들기 어려워요. 잠시 후 다시 이야기해 주세요.",
+                emotion=emotion,
+                color=emotion_to_color(emotion),
+                retrieval_context=retrieved_contexts,
+            ).model_dump())
+
+        # LLM이 마크다운 코드블록이나 설명을 덧붙여도 JSON 객체만 추출
+        parsed = parse_json_object(response_text)
         chat_text = parsed.get("chat", "")
         response_type = parsed.get("type", "diary")
         emotion_data = parsed.get("emotion_data") or {}
@@ -162,26 +226,34 @@ async def chat(request: ChatRequest):
                 add_schedule=AddSchedule(**add_schedule_data) if add_schedule_data else None,
             )
 
+        # 응답 모델이 만들어진 뒤에만 부수 효과를 큐에 넣어, 500 응답이 기록을 남기지 않도록
+        response = ChatResponse(
+            type=response_type,
+            chat=chat_text,
+            emotion=emotion,
+            color=emotion_to_color(emotion),
+            action=action,
+            retrieval_context=retrieved_contexts,
+        )
+
+        # 일정 저장과 메모리 추가는 응답 이후 write-behind 큐에서 일괄 처리
         if action and action.add_schedule:
             s = action.add_schedule
-            await schedule_repo.create_schedule(
+            await write_behind.add_schedule(
                 user_id=request.user_id,
                 title=s.title,
                 scheduled_at=s.due_date,
                 description=s.description,
             )
 
-        rag_store.add_memory(f"USER: {last_user_message}")
-        rag_store.add_memory(f"ASSISTANT: {chat_text}", metadata={"emotion": emotion})
+        # 일기 저장 후 요약 파이프라인이 (user_id, date) 기준으로 압축
+        turn_date = request.date or date_type.today()
+        turn_metadata = {"user_id": request.user_id, "date": turn_date.isoformat()}
+        await write_behind.add_memory(f"USER: {last_user_message}", metadata=turn_metadata)
+        await write_behind.add_memory(f"ASSISTANT: {chat_text}", metadata={**turn_metadata, "emotion": emotion})
 
-        return ChatResponse(
-            type=response_type,
-            chat=chat_text,
-            emotion=emotion,
-            color=emotion_to_color(emotion),
-            action=action,
-            retrieval_context=retrieved_contexts,
-        )
+        # 한 번 검증한 모델을 바로 직렬화해 response_model 재검증을 건너뜀
+        return ORJSONResponse(response.model_dump())
 
     except HTTPException:
         raise
@@ -194,20 +266,22 @@ async def chat(request: ChatRequest):
 async def analyze_emotion(request: EmotionAnalysisResponse):
     try:
         from src.emotion_service import parse_emotion_payload
-        completion = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                get_prompt_for_emotion_analysis(),
-                {
-                    "role": "user",
-                    "content": request.text
-                },
-            ],
-            max_tokens=100,
-        )
-
-        emotion_raw = (completion.choices[0].message.content or "").strip()
-        emotion = parse_emotion_payload(emotion_raw)
+        try:
+            emotion_raw = await llm.chat_completion(
+                model="gpt-4o-mini",
+                messages=[
+                    get_prompt_for_emotion_analysis(),
+                    {
+                        "role": "user",
+                        "content": request.text
+                    },
+                ],
+                max_tokens=100,
+            )
+            emotion = parse_emotion_payload(emotion_raw)
+        except LLMUnavailableError:
+            emotion_raw = ""
+            emotion = label_emotion_locally(request.text)
 
         return {
             "emotion": emotion,
@@ -225,34 +299,60 @@ async def daily_summary(request: ChatRequest):
         if not request.messages:
             raise HTTPException(status_code=400, detail="messages is required")
 
-        completion = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                get_prompt_for_daily_summary(),
-                *[msg.model_dump() for msg in request.messages],
-            ],
-            max_tokens=180,
-        )
-
-        summary = (completion.choices[0].message.content or "").strip()
+        summary = await summarize_messages([msg.model_dump() for msg in request.messages])
         return DailySummaryResponse(summary=summary)
     except HTTPException:
         raise
+    except LLMUnavailableError as e:
+        raise HTTPException(status_code=503, detail=str(e)) from e
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e)) from e
 
-def _row_to_diary_response(row: dict) -> DiaryResponse:
-    return DiaryResponse(
-        id=row["id"],
-        user_id=row["user_id"],
-        date=row["date"],
-        messages=row["messages"],
-        summary=row["summary"],
-        emotion=row["emotion"],
-        color=row["color"],
-        created_at=row["created_at"],
+def _row_to_diary_response(row: dict, headers: dict[str, str]) -> ORJSONResponse:
+    # DB에서 읽은 행은 신뢰할 수 있으므로 Pydantic 검증 없이 바로 직렬화
+    return ORJSONResponse(
+        {
+            "id": row["id"],
+            "user_id": row["user_id"],
+            "date": row["date"],
+            "messages": row["messages"],
+            "summary": row["summary"],
+            "emotion": row["emotion"],
+            "color": row["color"],
+            "created_at": row["created_at"],
+        },
+        headers=headers,
     )
 
+def _diary_cache_headers(row: dict) -> dict[str, str]:
+    # created_at은 upsert/요약 갱신마다 NOW()로 바뀌므로 버전으로 사용
+    # GZip/Brotli로 인코딩이 달라져도 같은 버전이므로 weak ETag
+    modified = datetime.fromisoformat(row["created_at"])
+    return {
+        "ETag": f'W/"{row["id"]}-{int(modified.timestamp() * 1_000_000)}"',
+        "Last-Modified": format_datetime(modified, usegmt=True),
+        "Cache-Control": "private, no-cache",
+    }
+
+def _is_not_modified(request: Request, headers: dict[str, str], row: dict) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        # If-None-Match는 weak 비교: W/ 접두사를 양쪽 모두 떼고 비교
+        tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        return "*" in tags or headers["ETag"].removeprefix("W/") in tags
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        modified = datetime.fromisoformat(row["created_at"]).replace(microsecond=0)
+        return modified <= since
+    return False
+
 # 사용자의 일기를 저장하는 엔드포인트
 @app.post("/diary", response_model=DiaryResponse)
 async def save_diary(entry: DiaryEntry):
@@ -265,18 +365,24 @@ async def save_diary(entry: DiaryEntry):
             emotion=entry.emotion,
             color=entry.color,
         )
-        return _row_to_diary_response(row)
+        summary_pipeline.enqueue(entry.user_id, entry.date)
+        return _row_to_diary_response(row, _diary_cache_headers(row))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e)) from e
 
 # 사용자의 일기를 조회하는 엔드포인트
 @app.get("/diary", response_model=DiaryResponse)
-async def get_diary(user_id: int, date: str):
+async def get_diary(user_id: int, date: str, request: Request):
     try:
         row = await diary_repo.get_diary_by_user_and_date(user_id, date)
         if row is None:
             raise HTTPException(status_code=404, detail="해당 날짜의 일기를 찾을 수 없습니다.")
-        return _row_to_diary_response(row)
+
+        headers = _diary_cache_headers(row)
+        # 변경이 없으면 본문 없이 304 반환
+        if _is_not_modified(request, headers, row):
+            return Response(status_code=304, headers=headers)
+        return _row_to_diary_response(row, headers)
     except HTTPException:
         raise
     except Exception as e:
@@ -0,0 +1,132 @@
+"""/diary, /chat 응답 경로의 직렬화/파싱 CPU 비용 비교.
+
+- diary: Pydantic 생성 + response_model 검증/직렬화 + json.dumps  vs  검증 없는 dict + orjson
+- chat 파싱: 코드블록 제거 + json.loads  vs  parse_json_object
+- chat 응답: response_model 검증/직렬화 + json.dumps  vs  model_dump + orjson
+
+before 경로는 FastAPI serialize_response와 같은 순서(TypeAdapter.validate_python →
+dump_python(mode="json") → JSONResponse.render)를 따릅니다.
+
+실행: backend 디렉터리에서 `python -m benchmarks.json_paths`
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import timeit
+
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+
+from pydantic import TypeAdapter  # noqa: E402
+
+from app import (  # noqa: E402
+    ChatAction,
+    ChatResponse,
+    DiaryResponse,
+    ORJSONResponse,
+    _row_to_diary_response,
+)
+from src.llm_gateway import parse_json_object  # noqa: E402
+
+ROW = {
+    "id": 1,
+    "user_id": 1,
+    "date": "2026-04-03",
+    "messages": [
+        {"role": "user" if i % 2 == 0 else "assistant", "content": f"오늘은 친구와 만나서 즐거운 시간을 보냈어요 {i}"}
+        for i in range(40)
+    ],
+    "summary": "오늘은 친구와 만나서 즐거운 시간을 보냈지만 갑자기 비가 와서 당황스러웠어요",
+    "emotion": "기쁨",
+    "color": "#FFFF00",
+    "created_at": "2026-04-03T12:00:00.123456+00:00",
+}
+
+LLM_JSON = json.dumps(
+    {
+        "type": "complex",
+        "chat": "좋은 하루를 보내셨군요! 내일 일정도 등록해 둘게요.",
+        "emotion_data": {"label": "기쁨", "color": "#FFFF00"},
+        "action": {
+            "save_diary": True,
+            "add_schedule": {"title": "병원", "description": "오후 3시", "due_date": "2026-04-04"},
+        },
+    },
+    ensure_ascii=False,
+)
+LLM_FENCED = f"```json\n{LLM_JSON}\n```"
+
+
+def _json_dumps(content) -> bytes:
+    # FastAPI 기본 JSONResponse.render와 동일한 설정
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode("utf-8")
+
+
+_diary_field = TypeAdapter(DiaryResponse)
+_chat_field = TypeAdapter(ChatResponse)
+
+
+def _serialize_response(field: TypeAdapter, content) -> bytes:
+    # response_model이 있을 때 FastAPI serialize_response + JSONResponse.render가 하는 일
+    validated = field.validate_python(content)
+    return _json_dumps(field.dump_python(validated, mode="json"))
+
+
+def diary_before() -> bytes:
+    return _serialize_response(_diary_field, DiaryResponse(**ROW))
+
+
+def diary_after() -> bytes:
+    return _row_to_diary_response(ROW, {}).body
+
+
+def parse_before(text: str) -> dict:
+    text = text.strip()
+    if text.startswith("```"):
+        text = text.split("\n", 1)[-1].rsplit("```", 1)[0].strip()
+    return json.loads(text)
+
+
+def _chat_model(parsed: dict) -> ChatResponse:
+    action = parsed["action"]
+    return ChatResponse(
+        type=parsed["type"],
+        chat=parsed["chat"],
+        emotion=parsed["emotion_data"]["label"],
+        color=parsed["emotion_data"]["color"],
+        action=ChatAction(**action),
+        retrieval_context=["USER: 어제 친구랑 싸웠어", "ASSISTANT: 많이 속상하셨겠어요."],
+    )
+
+
+def chat_before() -> bytes:
+    return _serialize_response(_chat_field, _chat_model(parse_before(LLM_FENCED)))
+
+
+def chat_after() -> bytes:
+    return ORJSONResponse(_chat_model(parse_json_object(LLM_FENCED)).model_dump()).body
+
+
+def _report(name: str, before, after, runs: int = 20_000) -> None:
+    b = timeit.timeit(before, number=runs) / runs * 1e6
+    a = timeit.timeit(after, number=runs) / runs * 1e6
+    print(f"{name:<14} before {b:7.1f} us  after {a:7.1f} us  saved {b - a:6.1f} us/request")
+
+
+def main() -> None:
+    assert json.loads(diary_before()) == json.loads(diary_after())
+    assert json.loads(chat_before()) == json.loads(chat_after())
+    assert parse_before(LLM_FENCED) == parse_json_object(LLM_FENCED)
+    assert parse_json_object(f"응답입니다:\n{LLM_JSON}\n이상입니다.") == json.loads(LLM_JSON)
+    assert parse_json_object('Here {is} {"a":1}') == {"a": 1}
+    assert parse_json_object('{"a":1}\n{"b":2}') == {"a": 1}
+    assert parse_json_object('{"a": "}"}  ok}') == {"a": "}"}
+    _report("diary", diary_before, diary_after)
+    _report("chat parse", lambda: parse_before(LLM_FENCED), lambda: parse_json_object(LLM_FENCED))
+    _report("chat parse/raw", lambda: parse_before(LLM_JSON), lambda: parse_json_object(LLM_JSON))
+    _report("chat response", chat_before, chat_after)
+
+
+if __name__ == "__main__":
+    main()
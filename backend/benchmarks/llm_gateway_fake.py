@@ -0,0 +1,165 @@
+"""LLMGateway를 가짜 OpenAI 서버(httpx.MockTransport)에 붙여 재시도/서킷 브레이커/헤지를 확인.
+
+실행: backend 디렉터리에서 `python -m benchmarks.llm_gateway_fake`
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+
+import httpx
+from openai import AsyncOpenAI
+
+from src.llm_gateway import LLMGateway, LLMUnavailableError
+
+
+class FakeServer:
+    """script에 (상태 코드, 지연 초)를 넣어 두면 요청마다 하나씩 꺼내 응답. 비어 있으면 즉시 200."""
+
+    def __init__(self):
+        self.script: list[tuple[int, float]] = []
+        self.hits = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def handle(self, request: httpx.Request) -> httpx.Response:
+        self.hits += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            status, delay = self.script.pop(0) if self.script else (200, 0.0)
+            await asyncio.sleep(delay)
+        finally:
+            self.in_flight -= 1
+        if status != 200:
+            return httpx.Response(status, json={"error": {"message": f"fake {status}"}})
+        return httpx.Response(
+            200,
+            json={
+                "id": "fake",
+                "object": "chat.completion",
+                "created": 0,
+                "model": "fake",
+                "choices": [
+                    {"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": " ok "}}
+                ],
+            },
+        )
+
+    def client(self) -> AsyncOpenAI:
+        return AsyncOpenAI(
+            api_key="fake",
+            base_url="http://fake/v1",
+            max_retries=0,
+            http_client=httpx.AsyncClient(transport=httpx.MockTransport(self.handle)),
+        )
+
+
+def _gateway(server: FakeServer, **overrides) -> LLMGateway:
+    options = dict(backoff_base=0.01, backoff_max=0.05, breaker_threshold=3, breaker_cooldown=0.3, timeout=2.0)
+    return LLMGateway(server.client(), **{**options, **overrides})
+
+
+async def _call(gateway: LLMGateway) -> str:
+    return await gateway.chat_completion(model="fake", messages=[{"role": "user", "content": "hi"}])
+
+
+async def check_backoff() -> None:
+    server = FakeServer()
+    gateway = _gateway(server, breaker_threshold=5)
+    server.script = [(429, 0), (500, 0), (503, 0)]
+    assert await _call(gateway) == "ok"
+    assert server.hits == 4
+    print("429/5xx backoff: 3 failures retried, 4th attempt ok")
+
+
+async def check_breaker() -> None:
+    server = FakeServer()
+    gateway = _gateway(server)
+    server.script = [(503, 0)] * 3
+    try:
+        await _call(gateway)
+        raise AssertionError("expected LLMUnavailableError")
+    except LLMUnavailableError:
+        pass
+
+    hits = server.hits
+    try:
+        await _call(gateway)
+        raise AssertionError("expected open circuit")
+    except LLMUnavailableError:
+        pass
+    assert server.hits == hits
+    print("breaker open: call rejected without reaching the provider")
+
+    # half-open: 동시에 10개를 보내도 probe 하나만 제공자에 도달
+    await asyncio.sleep(0.35)
+    server.script = [(200, 0.1)]
+    results = await asyncio.gather(*[_call(gateway) for _ in range(10)], return_exceptions=True)
+    rejected = sum(isinstance(r, LLMUnavailableError) for r in results)
+    assert server.hits == hits + 1 and rejected == 9, (server.hits - hits, rejected)
+    assert await _call(gateway) == "ok"
+    print("breaker half-open: 1 probe of 10 concurrent calls reached the provider, then closed")
+
+    # probe 실패 시 바로 다시 열림
+    server.script = [(503, 0)] * 3
+    for _ in range(2):
+        try:
+            await _call(gateway)
+        except LLMUnavailableError:
+            pass
+    await asyncio.sleep(0.35)
+    server.script = [(503, 0)]
+    hits = server.hits
+    results = await asyncio.gather(*[_call(gateway) for _ in range(5)], return_exceptions=True)
+    assert all(isinstance(r, LLMUnavailableError) for r in results) and server.hits == hits + 1
+    print("breaker half-open: failed probe reopened the circuit")
+
+
+async def check_hedging() -> None:
+    server = FakeServer()
+    gateway = _gateway(server, hedge=True, max_retries=0)
+    gateway._latencies.extend([0.02] * 30)
+    server.script = [(200, 1.0), (200, 0)]
+    started = time.monotonic()
+    assert await _call(gateway) == "ok"
+    elapsed = time.monotonic() - started
+    assert elapsed < 0.5, elapsed
+    await asyncio.sleep(0.05)
+    assert server.in_flight == 0, "slow hedge loser should be cancelled"
+    print(f"hedging: slow first request hedged after p95, answered in {elapsed * 1e3:.0f} ms, loser cancelled")
+
+    # 헤지 대기 중 호출자가 취소돼도 첫 요청이 남지 않아야 함
+    server.script = [(200, 1.0)]
+    task = asyncio.create_task(_call(gateway))
+    await asyncio.sleep(0.01)
+    task.cancel()
+    try:
+        await task
+    except asyncio.CancelledError:
+        pass
+    await asyncio.sleep(0.05)
+    assert server.in_flight == 0
+    print("hedging: caller cancellation also cancels the in-flight request")
+
+
+async def check_concurrency() -> None:
+    server = FakeServer()
+    gateway = _gateway(server, max_concurrency=2, rate_per_sec=1000, burst=100, timeout=0.1, max_retries=0)
+    server.script = [(200, 1.0)] * 6
+    await asyncio.gather(*[_call(gateway) for _ in range(6)], return_exceptions=True)
+    await asyncio.sleep(0.05)
+    assert server.max_in_flight <= 2 and server.in_flight == 0, (server.max_in_flight, server.in_flight)
+    print("concurrency: timed-out requests are cancelled, in-flight never exceeded the semaphore")
+
+
+async def main() -> None:
+    await check_backoff()
+    await check_breaker()
+    await check_hedging()
+    await check_concurrency()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,56 @@
+"""MemoryRAGStore.retrieve(하이브리드 점수 + MMR)와 벡터화된 코사인 top-k 비교.
+
+둘 다 한 번의 행렬 곱으로 유사도를 계산하므로, 차이는 recency/감정 재점수화, 사용자 마스크, MMR 비용입니다.
+
+실행: backend 디렉터리에서 `python -m benchmarks.rag_retrieve`
+"""
+
+from __future__ import annotations
+
+import random
+import time
+import timeit
+
+import numpy as np
+
+from src.emotion_service import EMOTION_COLORS
+from src.rag_service import MemoryRAGStore
+
+
+def plain_top_k(store: MemoryRAGStore, query: str, k: int = 3) -> list[str]:
+    """코사인 유사도만 사용하는 top-k (벡터화)."""
+    query_embedding = store._encode(query)
+    similarity = store._embeddings[: len(store)] @ query_embedding
+    top = np.argpartition(-similarity, k - 1)[:k]
+    top = top[np.argsort(-similarity[top])]
+    return [store._items[i].text for i in top]
+
+
+def build_store(size: int) -> MemoryRAGStore:
+    rng = random.Random(0)
+    store = MemoryRAGStore()
+    store._model = None  # 모델 로딩 시간 제외, fallback 임베딩으로 측정
+    emotions = list(EMOTION_COLORS)
+    now = time.time()
+    for i in range(size):
+        text = f"USER: 오늘 {rng.choice(['친구', '회사', '가족', '운동'])} 때문에 {rng.choice(emotions)} {i}"
+        store.add_memory(
+            text,
+            metadata={"user_id": i % 10, "emotion": rng.choice(emotions)},
+            created_at=now - rng.uniform(0, 90 * 86400),
+        )
+    return store
+
+
+def main() -> None:
+    query = "오늘 회사 때문에 슬픔"
+    for size in (100, 1_000, 10_000):
+        store = build_store(size)
+        runs = 50
+        plain = timeit.timeit(lambda: plain_top_k(store, query), number=runs) / runs
+        hybrid = timeit.timeit(lambda: store.retrieve(query, k=3, emotion="슬픔", user_id=0), number=runs) / runs
+        print(f"n={size:>6}  cosine top-k {plain * 1e3:8.3f} ms  hybrid+MMR {hybrid * 1e3:8.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
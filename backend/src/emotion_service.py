@@ -18,6 +18,8 @@ EMOTION_COLORS: dict[str, str] = {
     "중립": "#FFFFFF",
 }
 
+EMOTION_INDEX: dict[str, int] = {label: i for i, label in enumerate(EMOTION_COLORS)}
+
 EMOTION_ALIASES: dict[str, str] = {
     "angry": "분노",
     "anger": "분노",
@@ -80,5 +82,24 @@ def extract_emotion_tag(text: str) -> tuple[str, str]:
     return clean_text, parse_emotion_payload(payload)
 
 
+def label_emotion_locally(text: str) -> str:
+    """LLM을 쓸 수 없을 때 텍스트에 포함된 감정 단어로 감정을 추정합니다."""
+    lowered = text.lower()
+    for label in EMOTION_COLORS:
+        if label in text:
+            return label
+    for alias, label in EMOTION_ALIASES.items():
+        if alias in lowered:
+            return label
+    return "중립"
+
+
+def emotion_index(emotion: Any) -> int:
+    """감정 라벨을 EMOTION_COLORS 순서의 정수 ID로 변환합니다. 없거나 문자열이 아니면 -1."""
+    if not isinstance(emotion, str) or not emotion:
+        return -1
+    return EMOTION_INDEX[_normalize_emotion_name(emotion)]
+
+
 def emotion_to_color(emotion: str) -> str:
     return EMOTION_COLORS.get(_normalize_emotion_name(emotion), EMOTION_COLORS["중립"])
\ No newline at end of file
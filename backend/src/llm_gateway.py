@@ -0,0 +1,231 @@
+"""OpenAI 호출을 한 곳에서 관리하는 게이트웨이.
+
+동시성 제한(semaphore), 토큰 버킷 속도 제한, 429/5xx 지수 백오프 재시도,
+p95 지연 이후 헤지(hedged) 요청, 서킷 브레이커를 제공합니다.
+OPENAI_BASE_URL 환경변수로 로컬 가짜 서버를 가리키거나, benchmarks/llm_gateway_fake.py처럼
+httpx.MockTransport를 쓰는 클라이언트를 넘겨 테스트할 수 있습니다.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import random
+import time
+from collections import deque
+from typing import Any
+
+import openai
+import orjson
+from openai import AsyncOpenAI
+
+_decoder = json.JSONDecoder()
+
+
+class LLMUnavailableError(Exception):
+    """재시도를 모두 소진했거나 서킷이 열려 있어 LLM을 사용할 수 없음."""
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.capacity = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class CircuitBreaker:
+    """연속 실패가 threshold에 도달하면 cooldown 동안 호출을 차단하고, 이후 한 번 시험 호출을 허용.
+
+    half-open 상태에서는 시험 호출(probe) 하나만 통과시키고, 그 결과가 나올 때까지 나머지는 차단합니다.
+    probe가 결과 없이 사라진 경우(취소 등)에 대비해 cooldown이 지나면 새 probe를 허용합니다.
+    """
+
+    def __init__(self, threshold: int, cooldown: float):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self._failures = 0
+        self._opened_at: float | None = None
+        self._probe_at: float | None = None
+
+    def allow(self) -> bool:
+        if self._opened_at is None:
+            return True
+        now = time.monotonic()
+        if now - self._opened_at < self.cooldown:
+            return False
+        if self._probe_at is not None and now - self._probe_at < self.cooldown:
+            return False
+        self._probe_at = now
+        return True
+
+    def record_success(self) -> None:
+        self._failures = 0
+        self._opened_at = None
+        self._probe_at = None
+
+    def record_failure(self) -> None:
+        self._failures += 1
+        if self._probe_at is not None or self._failures >= self.threshold:
+            # probe 실패 시 바로 다시 열림
+            self._opened_at = time.monotonic()
+            self._probe_at = None
+
+
+def parse_json_object(text: str) -> dict[str, Any]:
+    """LLM 출력에서 JSON 객체를 읽습니다.
+
+    순수 JSON이면 orjson으로 바로 파싱합니다. 실패하거나 마크다운 코드블록/앞뒤 설명이 붙은 경우
+    '{' 위치마다 객체 하나를 디코딩해 보고, 처음 성공한 객체를 반환합니다(뒤의 내용은 무시).
+    """
+    start = text.find("{")
+    if start == -1:
+        raise ValueError("LLM 응답에 JSON 객체가 없습니다.")
+    if start == 0 and text.endswith("}"):
+        try:
+            parsed = orjson.loads(text)
+        except orjson.JSONDecodeError:
+            pass
+        else:
+            if isinstance(parsed, dict):
+                return parsed
+
+    error: json.JSONDecodeError | None = None
+    while start != -1:
+        try:
+            parsed, _ = _decoder.raw_decode(text, start)
+            return parsed
+        except json.JSONDecodeError as e:
+            error = error or e
+        start = text.find("{", start + 1)
+    raise error
+
+
+def _is_retryable(error: Exception) -> bool:
+    if isinstance(error, (openai.RateLimitError, openai.APITimeoutError, openai.APIConnectionError, asyncio.TimeoutError)):
+        return True
+    return isinstance(error, openai.APIStatusError) and error.status_code >= 500
+
+
+class LLMGateway:
+    def __init__(
+        self,
+        client: AsyncOpenAI,
+        max_concurrency: int = 8,
+        rate_per_sec: float = 5.0,
+        burst: int = 10,
+        timeout: float = 20.0,
+        max_retries: int = 3,
+        backoff_base: float = 0.5,
+        backoff_max: float = 8.0,
+        hedge: bool = False,
+        breaker_threshold: int = 5,
+        breaker_cooldown: float = 30.0,
+    ):
+        self.client = client
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.hedge = hedge
+        self.breaker = CircuitBreaker(breaker_threshold, breaker_cooldown)
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._bucket = TokenBucket(rate_per_sec, burst)
+        self._latencies: deque[float] = deque(maxlen=200)
+
+    @classmethod
+    def from_env(cls, **overrides: Any) -> "LLMGateway":
+        """LLM_* 환경변수로 설정을 읽습니다. overrides로 일부 값을 덮어쓸 수 있습니다."""
+        # 재시도는 게이트웨이가 담당하므로 SDK 자체 재시도는 끔
+        client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"), max_retries=0)
+        options: dict[str, Any] = {
+            "max_concurrency": int(os.getenv("LLM_MAX_CONCURRENCY", "8")),
+            "rate_per_sec": float(os.getenv("LLM_RATE_PER_SEC", "5")),
+            "burst": int(os.getenv("LLM_BURST", "10")),
+            "timeout": float(os.getenv("LLM_TIMEOUT", "20")),
+            "max_retries": int(os.getenv("LLM_MAX_RETRIES", "3")),
+            "hedge": os.getenv("LLM_HEDGE", "0") == "1",
+        }
+        return cls(client, **{**options, **overrides})
+
+    def p95_latency(self) -> float | None:
+        if len(self._latencies) < 20:
+            return None
+        ordered = sorted(self._latencies)
+        return ordered[int(len(ordered) * 0.95) - 1]
+
+    async def chat_completion(self, **kwargs: Any) -> str:
+        """chat.completions.create를 호출하고 첫 번째 응답 메시지 내용을 반환합니다."""
+        if not self.breaker.allow():
+            raise LLMUnavailableError("LLM circuit is open")
+
+        for attempt in range(self.max_retries + 1):
+            try:
+                content = await self._attempt(kwargs)
+            except Exception as e:
+                if not _is_retryable(e):
+                    if isinstance(e, openai.APIStatusError):
+                        # 4xx 등은 요청 문제이므로 제공자는 정상으로 간주
+                        self.breaker.record_success()
+                    raise
+                self.breaker.record_failure()
+                if attempt == self.max_retries or not self.breaker.allow():
+                    raise LLMUnavailableError(str(e)) from e
+                delay = min(self.backoff_max, self.backoff_base * 2 ** attempt)
+                await asyncio.sleep(delay * random.uniform(0.5, 1.0))
+            else:
+                self.breaker.record_success()
+                return content
+        raise LLMUnavailableError("unreachable")
+
+    async def _attempt(self, kwargs: dict[str, Any]) -> str:
+        deadline = self.p95_latency() if self.hedge else None
+        if deadline is None:
+            return await self._call(kwargs)
+
+        # p95 안에 응답이 없으면 같은 요청을 하나 더 보내고 먼저 끝난 쪽을 사용
+        first = asyncio.create_task(self._call(kwargs))
+        tasks = [first]
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=deadline)
+            if done:
+                return first.result()
+            tasks.append(asyncio.create_task(self._call(kwargs)))
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+            # 둘 다 실패하면 먼저 보낸 요청의 오류를 전달
+            return first.result()
+        finally:
+            # 호출자가 취소된 경우를 포함해 끝나지 않은 요청은 항상 취소
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    async def _call(self, kwargs: dict[str, Any]) -> str:
+        await self._bucket.acquire()
+        # 비동기 클라이언트라 타임아웃/헤지 취소 시 HTTP 요청도 함께 종료되어 semaphore가 실제 동시 요청 수와 일치
+        async with self._semaphore:
+            started = time.monotonic()
+            completion = await asyncio.wait_for(
+                self.client.chat.completions.create(timeout=self.timeout, **kwargs),
+                timeout=self.timeout,
+            )
+            self._latencies.append(time.monotonic() - started)
+        return (completion.choices[0].message.content or "").strip()
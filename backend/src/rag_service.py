@@ -2,29 +2,58 @@
 
 from __future__ import annotations
 
+import time
 from dataclasses import dataclass
 from typing import Any
 
 import numpy as np
 
+from src.emotion_service import emotion_index
+
 try:
     from sentence_transformers import SentenceTransformer
 except Exception:  # pragma: no cover - optional dependency at runtime
     SentenceTransformer = None  # type: ignore
 
+# 모델이 없을 때 사용하는 fallback 벡터 길이
+_FALLBACK_DIM = 64
+
 
 @dataclass
 class MemoryItem:
     text: str
     metadata: dict[str, Any]
-    embedding: np.ndarray
 
 
 class MemoryRAGStore:
-    def __init__(self, model_name: str = "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"):
+    """임베딩/생성 시각/감정 ID/사용자 ID를 병렬 NumPy 배열로 보관하고, 한 번의 벡터 연산으로 재점수화합니다.
+
+    score = cosine * (1 - recency_weight + recency_weight * 0.5 ** (age / half_life))
+            + emotion_boost * (감정 일치 여부)
+    user_id를 주면 해당 사용자의 메모리만 후보가 되며, 상위 후보는 MMR(mmr_lambda)로 중복을 제거해 k개를 고릅니다.
+    """
+
+    def __init__(
+        self,
+        model_name: str = "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2",
+        half_life_days: float = 14.0,
+        recency_weight: float = 0.3,
+        emotion_boost: float = 0.1,
+        mmr_lambda: float = 0.7,
+    ):
         self.model_name = model_name
+        self.half_life_days = half_life_days
+        self.recency_weight = recency_weight
+        self.emotion_boost = emotion_boost
+        self.mmr_lambda = mmr_lambda
         self._model = self._load_model()
         self._items: list[MemoryItem] = []
+        self._embeddings = np.empty((0, 0), dtype=np.float32)
+        self._timestamps = np.empty(0, dtype=np.float64)
+        self._emotion_ids = np.empty(0, dtype=np.int8)
+        self._user_ids = np.empty(0, dtype=np.int64)
+        # user_id -> (생성 시각, 감정): 사용자별 최근 감정을 스캔 없이 조회
+        self._latest_emotions: dict[int, tuple[float, str]] = {}
 
     def _load_model(self):
         if SentenceTransformer is None:
@@ -34,41 +63,179 @@ class MemoryRAGStore:
     def _encode(self, text: str) -> np.ndarray:
         if self._model is None:
             # Fallback deterministic vector when model is unavailable.
-            values = [ord(c) % 101 for c in text[:64]]
+            values = [ord(c) % 101 for c in text[:_FALLBACK_DIM]]
             if not values:
                 values = [0]
-            vector = np.array(values, dtype=np.float32)
-            return vector / np.linalg.norm(vector)
+            vector = np.zeros(_FALLBACK_DIM, dtype=np.float32)
+            vector[: len(values)] = values
+            norm = np.linalg.norm(vector)
+            return vector / norm if norm else vector
 
         embedding = self._model.encode(text, normalize_embeddings=True)
         return np.array(embedding, dtype=np.float32)
 
-    def add_memory(self, text: str, metadata: dict[str, Any] | None = None) -> None:
-        embedding = self._encode(text)
-        self._items.append(MemoryItem(text=text, metadata=metadata or {}, embedding=embedding))
-
-    def retrieve(self, query: str, k: int = 3) -> list[dict[str, Any]]:
-        if not self._items:
+    def encode_batch(self, texts: list[str]) -> np.ndarray:
+        """여러 텍스트를 한 번의 모델 호출로 인코딩합니다. (len(texts), dim) 배열 반환."""
+        if self._model is None:
+            return np.stack([self._encode(text) for text in texts])
+        embeddings = self._model.encode(texts, normalize_embeddings=True, batch_size=max(len(texts), 1))
+        return np.asarray(embeddings, dtype=np.float32)
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def add_memory(
+        self,
+        text: str,
+        metadata: dict[str, Any] | None = None,
+        created_at: float | None = None,
+    ) -> None:
+        self._append(text, metadata or {}, self._encode(text), created_at)
+
+    def add_memories(
+        self,
+        texts: list[str],
+        metadatas: list[dict[str, Any] | None],
+        embeddings: np.ndarray | None = None,
+        created_ats: list[float | None] | None = None,
+    ) -> None:
+        """여러 메모리를 한 번에 추가합니다. embeddings를 주면 인코딩을 건너뜁니다."""
+        if not texts:
+            return
+        if embeddings is None:
+            embeddings = self.encode_batch(texts)
+        created_ats = created_ats or [None] * len(texts)
+        for text, metadata, embedding, created_at in zip(texts, metadatas, embeddings, created_ats):
+            self._append(text, metadata or {}, embedding, created_at)
+
+    def _append(
+        self,
+        text: str,
+        metadata: dict[str, Any],
+        embedding: np.ndarray,
+        created_at: float | None,
+    ) -> None:
+        n = len(self._items)
+        if n == len(self._timestamps):
+            self._grow(max(16, n * 2), embedding.shape[0])
+        created_at = time.time() if created_at is None else created_at
+        user_id = metadata.get("user_id")
+        emotion = metadata.get("emotion")
+        self._items.append(MemoryItem(text=text, metadata=metadata))
+        self._embeddings[n] = embedding
+        self._timestamps[n] = created_at
+        self._emotion_ids[n] = emotion_index(emotion)
+        self._user_ids[n] = user_id if isinstance(user_id, int) else -1
+        if isinstance(user_id, int) and isinstance(emotion, str) and emotion:
+            # 오래된 날짜의 요약이 나중에 추가돼도 더 최근 감정을 덮어쓰지 않도록 시각 비교
+            latest = self._latest_emotions.get(user_id)
+            if latest is None or created_at >= latest[0]:
+                self._latest_emotions[user_id] = (created_at, emotion)
+
+    def _grow(self, capacity: int, dim: int) -> None:
+        # 배열 용량을 두 배씩 늘려 append 비용을 상수로 유지
+        n = len(self._items)
+        embeddings = np.zeros((capacity, dim), dtype=np.float32)
+        timestamps = np.zeros(capacity, dtype=np.float64)
+        emotion_ids = np.full(capacity, -1, dtype=np.int8)
+        user_ids = np.full(capacity, -1, dtype=np.int64)
+        if n:
+            embeddings[:n] = self._embeddings[:n]
+        timestamps[:n] = self._timestamps[:n]
+        emotion_ids[:n] = self._emotion_ids[:n]
+        user_ids[:n] = self._user_ids[:n]
+        self._embeddings, self._timestamps = embeddings, timestamps
+        self._emotion_ids, self._user_ids = emotion_ids, user_ids
+
+    def replace_memories(
+        self,
+        match: dict[str, Any],
+        text: str,
+        metadata: dict[str, Any] | None = None,
+        created_at: float | None = None,
+    ) -> int:
+        """match의 모든 키/값이 일치하는 메모리를 제거하고 text 하나로 대체합니다. 제거한 개수를 반환."""
+        keep = np.array(
+            [any(item.metadata.get(key) != value for key, value in match.items()) for item in self._items],
+            dtype=bool,
+        )
+        removed = int(len(keep) - keep.sum())
+        if removed:
+            n = len(self._items)
+            self._items = [item for item, k in zip(self._items, keep) if k]
+            self._embeddings = self._embeddings[:n][keep]
+            self._timestamps = self._timestamps[:n][keep]
+            self._emotion_ids = self._emotion_ids[:n][keep]
+            self._user_ids = self._user_ids[:n][keep]
+        self.add_memory(text, metadata={**match, **(metadata or {})}, created_at=created_at)
+        return removed
+
+    def latest_emotion(self, user_id: int) -> str | None:
+        """해당 사용자의 메모리 중 가장 최근에 감정이 기록된 메모리의 감정 라벨."""
+        latest = self._latest_emotions.get(user_id)
+        return latest[1] if latest else None
+
+    def _scores(
+        self,
+        query_embedding: np.ndarray,
+        emotion: str | None,
+        now: float,
+        user_id: int | None = None,
+    ) -> np.ndarray:
+        n = len(self._items)
+        similarity = self._embeddings[:n] @ query_embedding
+        age_days = np.maximum(now - self._timestamps[:n], 0.0) / 86400.0
+        decay = np.exp2(-age_days / self.half_life_days)
+        scores = similarity * (1.0 - self.recency_weight + self.recency_weight * decay)
+        query_emotion = emotion_index(emotion)
+        if query_emotion >= 0:
+            scores += self.emotion_boost * (self._emotion_ids[:n] == query_emotion)
+        if user_id is not None:
+            # 다른 사용자의 메모리는 후보에서 제외
+            scores[self._user_ids[:n] != user_id] = -np.inf
+        return scores
+
+    def _mmr(self, candidates: np.ndarray, scores: np.ndarray, k: int) -> list[int]:
+        """후보 중에서 관련도와 이미 고른 메모리와의 유사도를 절충해 k개를 고릅니다."""
+        vectors = self._embeddings[candidates]
+        pairwise = vectors @ vectors.T
+        relevance = scores[candidates]
+        selected: list[int] = [0]
+        max_sim = pairwise[0].copy()
+        for _ in range(1, min(k, len(candidates))):
+            mmr = self.mmr_lambda * relevance - (1.0 - self.mmr_lambda) * max_sim
+            mmr[selected] = -np.inf
+            best = int(np.argmax(mmr))
+            selected.append(best)
+            np.maximum(max_sim, pairwise[best], out=max_sim)
+        return [int(candidates[i]) for i in selected]
+
+    def retrieve(
+        self,
+        query: str,
+        k: int = 3,
+        emotion: str | None = None,
+        now: float | None = None,
+        user_id: int | None = None,
+    ) -> list[dict[str, Any]]:
+        if not self._items or k <= 0:
             return []
 
         query_embedding = self._encode(query)
-        scored: list[tuple[float, MemoryItem]] = []
-
-        for item in self._items:
-            min_len = min(len(item.embedding), len(query_embedding))
-            if min_len == 0:
-                similarity = 0.0
-            else:
-                similarity = float(np.dot(item.embedding[:min_len], query_embedding[:min_len]))
-            scored.append((similarity, item))
-
-        scored.sort(key=lambda x: x[0], reverse=True)
-        top_items = scored[:k]
+        scores = self._scores(query_embedding, emotion, time.time() if now is None else now, user_id)
+
+        # MMR 후보 풀: 상위 4k개 (argpartition으로 전체 정렬 회피)
+        pool = min(int(np.isfinite(scores).sum()), k * 4)
+        if pool == 0:
+            return []
+        candidates = np.argpartition(-scores, pool - 1)[:pool]
+        candidates = candidates[np.argsort(-scores[candidates])]
+        top = self._mmr(candidates, scores, k)
         return [
             {
-                "text": item.text,
-                "score": score,
-                "metadata": item.metadata,
+                "text": self._items[i].text,
+                "score": float(scores[i]),
+                "metadata": self._items[i].metadata,
             }
-            for score, item in top_items
-        ]
\ No newline at end of file
+            for i in top
+        ]
@@ -1,12 +1,36 @@
 from __future__ import annotations
 
 import json
+import os
+import time
+from collections import OrderedDict
 from datetime import date as date_type
 from datetime import datetime
 from typing import Any
 
 from src.database import get_pool
 
+# 워커별 읽기 캐시: (user_id, date) -> (저장 시각, row). 이 워커의 쓰기는 즉시 반영되고,
+# 다른 워커의 쓰기는 TTL이 지나면 반영됩니다.
+_CACHE_TTL = float(os.getenv("DIARY_CACHE_TTL", "30"))
+_CACHE_SIZE = int(os.getenv("DIARY_CACHE_SIZE", "1024"))
+_cache: OrderedDict[tuple[int, date_type], tuple[float, dict[str, Any] | None]] = OrderedDict()
+
+
+def _cache_get(key: tuple[int, date_type]) -> tuple[bool, dict[str, Any] | None]:
+    entry = _cache.get(key)
+    if entry is None or time.monotonic() - entry[0] > _CACHE_TTL:
+        return False, None
+    _cache.move_to_end(key)
+    return True, entry[1]
+
+
+def _cache_put(key: tuple[int, date_type], row: dict[str, Any] | None) -> None:
+    _cache[key] = (time.monotonic(), row)
+    _cache.move_to_end(key)
+    while len(_cache) > _CACHE_SIZE:
+        _cache.popitem(last=False)
+
 
 def _serialize_row(row: Any) -> dict[str, Any]:
     d = dict(row)
@@ -52,7 +76,9 @@ async def save_diary(
             emotion,
             color,
         )
-        return _serialize_row(row)
+    result = _serialize_row(row)
+    _cache_put((user_id, date), result)
+    return result
 
 
 async def get_diary_by_user_and_date(
@@ -64,10 +90,42 @@ async def get_diary_by_user_and_date(
         # 문자열로 들어왔다면 date 객체로 변환
         date = datetime.strptime(date, "%Y-%m-%d").date()
         
+    hit, cached = _cache_get((user_id, date))
+    if hit:
+        return cached
+
     async with get_pool().acquire() as conn:
         row = await conn.fetchrow(
             "SELECT * FROM diaries WHERE user_id = $1 AND date = $2",
             user_id,
             date,
         )
-        return _serialize_row(row) if row else None
+    result = _serialize_row(row) if row else None
+    _cache_put((user_id, date), result)
+    return result
+
+
+async def update_summary(
+    user_id: int,
+    date: date_type,
+    summary: str,
+) -> dict[str, Any] | None:
+
+    if isinstance(date, str):
+        # 문자열로 들어왔다면 date 객체로 변환
+        date = datetime.strptime(date, "%Y-%m-%d").date()
+
+    async with get_pool().acquire() as conn:
+        row = await conn.fetchrow(
+            """
+            UPDATE diaries SET summary = $3, created_at = NOW()
+            WHERE user_id = $1 AND date = $2
+            RETURNING *
+            """,
+            user_id,
+            date,
+            summary,
+        )
+    result = _serialize_row(row) if row else None
+    _cache_put((user_id, date), result)
+    return result
@@ -32,6 +32,26 @@ async def create_schedule(
         return dict(row)
 
 
+async def create_schedules(
+    schedules: list[tuple[int, str, str | None, date]],
+) -> None:
+    """(user_id, title, description, scheduled_at) 목록을 한 번의 executemany로 삽입합니다.
+
+    scheduled_at은 호출 전에 date로 변환되어 있어야 합니다.
+    """
+    if not schedules:
+        return
+
+    async with get_pool().acquire() as conn:
+        await conn.executemany(
+            """
+            INSERT INTO schedules (user_id, title, description, scheduled_at)
+            VALUES ($1, $2, $3, $4)
+            """,
+            schedules,
+        )
+
+
 async def get_schedules_by_user(user_id: int) -> list[dict[str, Any]]:
     async with get_pool().acquire() as conn:
         rows = await conn.fetch(
@@ -0,0 +1,151 @@
+"""일기 저장 이후 하루치 대화 메모리를 요약 메모리 하나로 압축하는 백그라운드 파이프라인."""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from datetime import date as date_type
+from datetime import datetime, timezone
+from typing import Awaitable, Callable
+
+from src.rag_service import MemoryRAGStore
+from src.repositories import diaries as diary_repo
+
+Summarizer = Callable[[list[dict]], Awaitable[str]]
+
+
+def _date_timestamp(date: str) -> float:
+    day = datetime.strptime(date, "%Y-%m-%d").replace(tzinfo=timezone.utc)
+    return day.timestamp()
+
+
+class DailySummaryPipeline:
+    """save_diary 이후 (user_id, date) 작업을 받아 배치 단위로 천천히 처리합니다.
+
+    - batch_size: 한 번에 처리할 최대 작업 수
+    - min_interval: 요약(LLM 호출) 사이의 최소 간격(초). 대화 트래픽과 경쟁하지 않도록 제한
+    - batch_delay: 배치 사이 대기 시간(초). 그 사이 들어온 같은 날짜 작업은 하나로 합쳐짐
+    - max_attempts: 실패한 작업의 최대 시도 횟수. 재시도 간격은 retry_delay부터 두 배씩 증가
+    - drain_timeout: stop() 시 남은 작업을 처리하는 최대 시간(초)
+    """
+
+    def __init__(
+        self,
+        rag_store: MemoryRAGStore,
+        summarize: Summarizer,
+        batch_size: int = 5,
+        min_interval: float = 2.0,
+        batch_delay: float = 30.0,
+        max_attempts: int = 3,
+        retry_delay: float = 60.0,
+        drain_timeout: float = 10.0,
+    ):
+        self.rag_store = rag_store
+        self.summarize = summarize
+        self.batch_size = batch_size
+        self.min_interval = min_interval
+        self.batch_delay = batch_delay
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.drain_timeout = drain_timeout
+        # (user_id, date) -> (실패 횟수, 다음 시도 가능 시각)
+        self._pending: dict[tuple[int, str], tuple[int, float]] = {}
+        self._wakeup = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """주기 작업을 멈추고 남은 작업을 drain_timeout 안에서 처리합니다."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+        try:
+            await asyncio.wait_for(self._drain(), timeout=self.drain_timeout)
+        except asyncio.TimeoutError:
+            pass
+        if self._pending:
+            print(f"[summary_pipeline] 종료 시 처리하지 못한 요약 작업 {len(self._pending)}개")
+
+    def enqueue(self, user_id: int, date: date_type | str) -> None:
+        key = (user_id, date.isoformat() if isinstance(date, date_type) else date)
+        # 같은 날짜가 여러 번 저장되면 한 번만 요약 (새로 저장되면 실패 횟수 초기화)
+        self._pending[key] = (0, 0.0)
+        self._wakeup.set()
+
+    def _take_batch(self, now: float) -> list[tuple[tuple[int, str], int]]:
+        ready = [key for key, (_, ready_at) in self._pending.items() if ready_at <= now][: self.batch_size]
+        return [(key, self._pending.pop(key)[0]) for key in ready]
+
+    def _retry_later(self, key: tuple[int, str], failures: int, error: Exception) -> None:
+        failures += 1
+        if failures >= self.max_attempts:
+            print(f"[summary_pipeline] {key[0]}/{key[1]} 요약 {failures}회 실패, 포기: {error}")
+            return
+        print(f"[summary_pipeline] {key[0]}/{key[1]} 요약 실패({failures}회), 재시도 예정: {error}")
+        # 그 사이 다시 저장되어 새 작업이 들어왔다면 그쪽을 유지
+        self._pending.setdefault(key, (failures, time.monotonic() + self.retry_delay * 2 ** (failures - 1)))
+        self._wakeup.set()
+
+    async def _process(self, batch: list[tuple[tuple[int, str], int]]) -> None:
+        for i, (key, failures) in enumerate(batch):
+            try:
+                await self.compact(*key)
+            except asyncio.CancelledError:
+                # 처리하지 못한 작업은 stop()의 drain에서 다시 처리
+                for rest_key, rest_failures in batch[i:]:
+                    self._pending.setdefault(rest_key, (rest_failures, 0.0))
+                raise
+            except Exception as e:
+                self._retry_later(key, failures, e)
+            await asyncio.sleep(self.min_interval)
+
+    async def _drain(self) -> None:
+        while True:
+            batch = self._take_batch(float("inf"))
+            if not batch:
+                return
+            for key, failures in batch:
+                try:
+                    await self.compact(*key)
+                except Exception as e:
+                    print(f"[summary_pipeline] {key[0]}/{key[1]} 종료 중 요약 실패: {e}")
+
+    async def _run(self) -> None:
+        while True:
+            await self._wakeup.wait()
+            await asyncio.sleep(self.batch_delay)
+            self._wakeup.clear()
+
+            batch = self._take_batch(time.monotonic())
+            if self._pending:
+                # 남은 작업(재시도 대기 포함)은 다음 배치에서 처리
+                self._wakeup.set()
+            await self._process(batch)
+
+    async def compact(self, user_id: int, date: str) -> None:
+        row = await diary_repo.get_diary_by_user_and_date(user_id, date)
+        if row is None:
+            return
+
+        summary = (row.get("summary") or "").strip()
+        if not summary and row["messages"]:
+            summary = await self.summarize(row["messages"])
+            await diary_repo.update_summary(user_id, date, summary)
+        if not summary:
+            return
+
+        self.rag_store.replace_memories(
+            {"user_id": user_id, "date": date},
+            f"SUMMARY ({date}): {summary}",
+            metadata={"emotion": row.get("emotion"), "summary": True},
+            # 압축 시각이 아니라 일기 날짜 기준으로 recency 감쇠가 적용되도록
+            created_at=min(_date_timestamp(date), time.time()),
+        )
@@ -0,0 +1,201 @@
+"""/chat 응답 이후에 일정 저장과 메모리 추가를 모아서 처리하는 write-behind 큐."""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from dataclasses import dataclass, field
+from datetime import date as date_type
+from datetime import datetime
+from typing import Any
+
+import asyncpg
+
+from src.rag_service import MemoryRAGStore
+from src.repositories import schedules as schedule_repo
+
+
+@dataclass
+class _Schedule:
+    user_id: int
+    title: str
+    description: str | None
+    scheduled_at: date_type
+
+    def as_row(self) -> tuple[int, str, str | None, date_type]:
+        return (self.user_id, self.title, self.description, self.scheduled_at)
+
+
+@dataclass
+class _Memory:
+    text: str
+    metadata: dict[str, Any] | None
+    created_at: float = field(default_factory=time.time)
+
+
+def _is_data_error(error: Exception) -> bool:
+    # 재시도해도 성공할 수 없는 행 자체의 문제 (제약 조건 위반, 잘못된 값)
+    return isinstance(error, (asyncpg.IntegrityConstraintViolationError, asyncpg.DataError))
+
+
+class WriteBehindQueue:
+    """flush_interval마다 쌓인 작업을 한 번에 기록합니다.
+
+    - 일정: schedule_repo.create_schedules (executemany 한 번)
+    - 메모리: rag_store.encode_batch 한 번으로 인코딩 후 추가
+    일정과 메모리는 따로 기록하며, DB/인코딩 실패 시 작업을 버리지 않고 다음 flush에서 다시 시도합니다.
+    대기 중인 작업(재시도 포함)이 max_pending에 도달하면 즉시 flush하고,
+    호출자는 자리가 날 때까지 기다립니다(backpressure).
+    """
+
+    def __init__(
+        self,
+        rag_store: MemoryRAGStore,
+        flush_interval: float = 1.0,
+        max_pending: int = 1000,
+    ):
+        self.rag_store = rag_store
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self._queue: asyncio.Queue[_Schedule | _Memory] = asyncio.Queue(maxsize=max_pending)
+        self._retry_schedules: list[_Schedule] = []
+        self._retry_memories: list[_Memory] = []
+        self._flush_now = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._task: asyncio.Task | None = None
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self, attempts: int = 3) -> None:
+        """주기 작업을 멈추고 남은 작업을 모두 기록합니다."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        for _ in range(attempts):
+            await self.flush()
+            if not self.pending():
+                return
+            await asyncio.sleep(self.flush_interval)
+        print(f"[write_behind] 종료 시 기록하지 못한 작업 {self.pending()}개")
+
+    def pending(self) -> int:
+        return self._queue.qsize() + len(self._retry_schedules) + len(self._retry_memories)
+
+    async def add_schedule(
+        self,
+        user_id: int,
+        title: str,
+        scheduled_at: date_type | str,
+        description: str | None = None,
+    ) -> None:
+        if isinstance(scheduled_at, str):
+            # 문자열로 들어왔다면 date 객체로 변환 (잘못된 값은 큐에 넣기 전에 호출자에게 오류)
+            scheduled_at = datetime.strptime(scheduled_at, "%Y-%m-%d").date()
+        await self._put(_Schedule(user_id, title, description, scheduled_at))
+
+    async def add_memory(self, text: str, metadata: dict[str, Any] | None = None) -> None:
+        await self._put(_Memory(text, metadata))
+
+    async def _put(self, item: _Schedule | _Memory) -> None:
+        # 재시도 대기 중인 작업도 포함해 max_pending을 넘지 않도록 대기
+        while self.pending() >= self.max_pending:
+            self._flush_now.set()
+            await asyncio.sleep(self.flush_interval)
+        if self._queue.full():
+            self._flush_now.set()
+        await self._queue.put(item)
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._flush_now.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._flush_now.clear()
+            try:
+                # stop()의 취소가 진행 중인 flush를 끊지 않도록 보호
+                await asyncio.shield(self.flush())
+            except Exception as e:
+                print(f"[write_behind] flush 실패: {e}")
+
+    async def flush(self) -> None:
+        async with self._flush_lock:
+            schedules, self._retry_schedules = self._retry_schedules, []
+            memories, self._retry_memories = self._retry_memories, []
+            while not self._queue.empty():
+                item = self._queue.get_nowait()
+                if isinstance(item, _Memory):
+                    memories.append(item)
+                else:
+                    schedules.append(item)
+
+            # 한쪽 실패가 다른 쪽 작업을 버리지 않도록 각각 처리하고, 남은 작업은 재시도 목록으로
+            try:
+                self._retry_memories.extend(await self._flush_memories(memories))
+            except Exception as e:
+                print(f"[write_behind] 메모리 {len(memories)}개 기록 실패, 다음 flush에서 재시도: {e}")
+                self._retry_memories.extend(memories)
+            try:
+                self._retry_schedules.extend(await self._flush_schedules(schedules))
+            except Exception as e:
+                print(f"[write_behind] 일정 {len(schedules)}개 기록 실패, 다음 flush에서 재시도: {e}")
+                self._retry_schedules.extend(schedules)
+
+    async def _flush_memories(self, memories: list[_Memory]) -> list[_Memory]:
+        """메모리를 기록하고 다시 시도해야 할 작업을 반환합니다."""
+        if not memories:
+            return []
+        texts = [m.text for m in memories]
+        try:
+            # 인코딩만 스레드에서 수행하고, 저장소 변경은 이벤트 루프에서 처리
+            embeddings = await asyncio.to_thread(self.rag_store.encode_batch, texts)
+        except Exception as e:
+            print(f"[write_behind] 메모리 {len(memories)}개 인코딩 실패, 다음 flush에서 재시도: {e}")
+            return memories
+
+        before = len(self.rag_store)
+        try:
+            self.rag_store.add_memories(
+                texts,
+                [m.metadata for m in memories],
+                embeddings=embeddings,
+                created_ats=[m.created_at for m in memories],
+            )
+        except Exception as e:
+            # 추가된 만큼은 건너뛰고, 실패한 메모리 하나만 제외한 나머지를 재시도
+            added = len(self.rag_store) - before
+            if added >= len(memories):
+                return []
+            print(f"[write_behind] 메모리 추가 불가, 제외: {memories[added].text!r} ({e})")
+            return memories[added + 1:]
+        return []
+
+    async def _flush_schedules(self, schedules: list[_Schedule]) -> list[_Schedule]:
+        """일정을 기록하고 다시 시도해야 할 작업을 반환합니다."""
+        if not schedules:
+            return []
+        try:
+            await schedule_repo.create_schedules([s.as_row() for s in schedules])
+            return []
+        except Exception as e:
+            if not _is_data_error(e):
+                print(f"[write_behind] 일정 {len(schedules)}개 저장 실패, 다음 flush에서 재시도: {e}")
+                return schedules
+
+        # 일부 행이 잘못된 경우: 한 행씩 넣어 문제 행만 제외
+        retry: list[_Schedule] = []
+        for schedule in schedules:
+            try:
+                await schedule_repo.create_schedules([schedule.as_row()])
+            except Exception as e:
+                if _is_data_error(e):
+                    print(f"[write_behind] 일정 저장 불가, 제외: {schedule} ({e})")
+                else:
+                    retry.append(schedule)
+        return retry
@@ -41,6 +41,12 @@ class _ChatScreenState extends State<ChatScreen> {
     super.dispose();
   }
 
+  // 일기 저장과 같은 기기 로컬 날짜 (YYYY-MM-DD)
+  String _todayString() {
+    final now = DateTime.now();
+    return '${now.year}-${now.month.toString().padLeft(2, '0')}-${now.day.toString().padLeft(2, '0')}';
+  }
+
   Future<void> _sendMessage() async {
     final text = _controller.text.trim();
     if (text.isEmpty || _isSending) {
@@ -69,6 +75,7 @@ class _ChatScreenState extends State<ChatScreen> {
         headers: {'Content-Type': 'application/json'},
         body: jsonEncode({
           'user_id': userId,
+          'date': _todayString(),
           'messages': messagesPayload
           }),
       );